@@ -1,43 +1,87 @@
 import os
-import requests
+import sys
+import socket
 import re
-import json
 import logging
 import argparse
 import time
-from typing import Dict, List
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from colorama import init, Fore, Style
+import orjson
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+from types import MappingProxyType
+from functools import lru_cache
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+from colorama import init
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+from urllib3.util.retry import Retry
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Constants
+THUNDERSTORE_HOST = "thunderstore.io"
 THUNDERSTORE_API_URL = "https://thunderstore.io/api/experimental/package/{owner}/{package}/"
 DEFAULT_CHANNEL = "repo"
 PREVIOUS_OUTPUT_URL = (
     "https://raw.githubusercontent.com/Jesewe/ModsUpdater/"
     "main/.github/output.json"
 )
+MOD_URL_PATTERN = re.compile(
+    r'https?://thunderstore\.io/c/(?P<channel>[^/]+)/'
+    r'p/(?P<owner>[^/]+)/(?P<package>[^/]+)/?'
+)
+POOL_SIZE = 32
+CACHE_PATH = ".mods_cache.sqlite"
+CACHE_EXPIRE_SECONDS = 900
+FULL_TABLE_KEYS = (
+    "name", "description", "url", "download_url", "icon_url", "channel",
+    "owner", "package", "version", "date_updated", "full_name"
+)
+SUMMARY_TABLE_KEYS = ("name", "version", "date_updated", "url")
+TELEGRAM_CHUNK_SIZE = 3500  # Telegram rejects messages longer than 4096 characters
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Colorama for colored terminal output
-init(autoreset=True)
+# Colorama is only needed to translate ANSI codes on Windows consoles
+if sys.platform == 'win32':
+    init(autoreset=True)
+
+# ANSI colors for terminal output, disabled when stdout is redirected
+USE_COLOR = sys.stdout.isatty()
+CYAN = "\x1b[36m" if USE_COLOR else ""
+RED = "\x1b[31m" if USE_COLOR else ""
+RESET = "\x1b[0m" if USE_COLOR else ""
+
+# Shared HTTP session so connections and TLS sessions are reused across requests.
+# Responses are cached on disk and revalidated with ETag/Last-Modified once stale.
+# The pool blocks when full, so extra workers wait for a connection instead of
+# opening (and handshaking) throwaway ones.
+SESSION = CachedSession(
+    CACHE_PATH,
+    backend="sqlite",
+    expire_after=CACHE_EXPIRE_SECONDS,
+    cache_control=True,
+    stale_if_error=True
+)
+SESSION.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip"})
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=POOL_SIZE,
+    pool_maxsize=POOL_SIZE,
+    pool_block=True,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
 
 def parse_mod_url(url: str) -> Dict[str, str]:
     """
     Parse a Thunderstore mod URL and extract channel, owner, and package.
     """
-    pattern = (
-        r'https?://thunderstore\.io/c/(?P<channel>[^/]+)/'
-        r'p/(?P<owner>[^/]+)/(?P<package>[^/]+)/?'
-    )
-    match = re.match(pattern, url)
+    match = MOD_URL_PATTERN.match(url)
     if not match:
         raise ValueError(f"Invalid mod URL: {url}")
     channel = match.group('channel') or DEFAULT_CHANNEL
@@ -46,23 +90,39 @@ def parse_mod_url(url: str) -> Dict[str, str]:
     return {"channel": channel, "owner": owner, "package": package}
 
 
-def get_latest_mod_info(channel: str, owner: str, package: str) -> Dict:
+def format_http_date(raw_date: str) -> str:
+    """
+    Convert a Thunderstore ISO-8601 timestamp into an HTTP date for conditional requests.
+    """
+    dt = datetime.fromisoformat(raw_date[:19]).replace(tzinfo=timezone.utc)
+    return format_datetime(dt, usegmt=True)
+
+
+def get_latest_mod_info(channel: str, owner: str, package: str, previous: Optional[Mapping] = None) -> Dict:
     """
     Retrieve the latest version information for a given mod from Thunderstore API.
+    If `previous` holds the mod's entry from the last run, the request is made conditional
+    and that entry is reused when Thunderstore reports the package as not modified.
     """
     api_url = THUNDERSTORE_API_URL.format(owner=owner, package=package)
-    resp = requests.get(api_url, timeout=10)
+    headers = {}
+    if previous and previous.get("raw_date"):
+        try:
+            headers["If-Modified-Since"] = format_http_date(previous["raw_date"])
+        except ValueError:
+            # Malformed timestamp from the last run: fall back to a plain request
+            pass
+    resp = SESSION.get(api_url, headers=headers, timeout=10)
+    if resp.status_code == 304 and previous:
+        return dict(previous)
     resp.raise_for_status()
-    data = resp.json()
+    data = orjson.loads(resp.content)
 
     latest = data.get("latest", {})
     version = latest.get("version_number")
-    raw_date = data.get("date_updated")
-    try:
-        dt = datetime.fromisoformat(raw_date.rstrip('Z'))
-        formatted_date = dt.strftime("%Y-%m-%d, %H:%M:%S")
-    except Exception:
-        formatted_date = raw_date
+    raw_date = data.get("date_updated") or ""
+    # Thunderstore always returns "YYYY-MM-DDTHH:MM:SS[.ffffff]Z", so slice instead of parsing
+    formatted_date = f"{raw_date[:10]}, {raw_date[11:19]}" if raw_date else raw_date
 
     # Additional fields for full output
     description = latest.get("description", "")
@@ -90,69 +150,96 @@ def get_latest_mod_info(channel: str, owner: str, package: str) -> Dict:
     }
 
 
-def fetch_all_updates(mods_url: str, max_workers: int = 5) -> List[Dict]:
+def load_mods_list(mods_url: str) -> List[Dict]:
     """
-    Fetch update information for all mods listed in the given JSON URL.
+    Download the JSON file with the list of mods and return its `repo_mods` entries.
     """
-    resp = requests.get(mods_url, timeout=10)
+    resp = SESSION.get(mods_url, timeout=10)
     resp.raise_for_status()
-    data = resp.json()
+    data = orjson.loads(resp.content)
+    return data.get("repo_mods", [])
 
-    mods = data.get("repo_mods", [])
-    results: List[Dict] = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {}
+
+def warm_dns(host: str = THUNDERSTORE_HOST):
+    """
+    Resolve the host once before the parallel fan-out, so the workers opening the first
+    pooled connections hit a warm resolver cache instead of all looking it up at once.
+    """
+    try:
+        socket.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+    except OSError as e:
+        logger.warning(f"Failed to resolve {host}: {e}")
+
+
+def fetch_all_updates(
+    mods: List[Dict], max_workers: int = POOL_SIZE, previous: Optional[Sequence[Mapping]] = None
+) -> List[Dict]:
+    """
+    Fetch update information for all mods in the given list.
+    Entries from `previous` (the last run's output) let unchanged packages skip the full API response.
+    """
+    previous_by_package = {
+        (item.get("channel"), item.get("owner"), item.get("package")): item
+        for item in previous or []
+    }
+
+    def iter_jobs():
+        # Parsed lazily, so requests for earlier mods are already running while later URLs are parsed
         for mod in mods:
             try:
                 parsed = parse_mod_url(mod.get("url", ""))
             except ValueError as e:
                 logger.warning(f"Skipping invalid URL {mod.get('url')}: {e}")
                 continue
-            futures[executor.submit(
-                get_latest_mod_info,
-                parsed["channel"], parsed["owner"], parsed["package"]
-            )] = mod.get("name")
-
-        for future in as_completed(futures):
-            mod_name = futures[future]
-            try:
-                info = future.result()
-                results.append(info)
-            except Exception as e:
-                logger.error(f"Error fetching {mod_name}: {e}")
+            key = (parsed["channel"], parsed["owner"], parsed["package"])
+            yield (mod.get("name"), *key, previous_by_package.get(key))
+
+    def fetch_job(job) -> Optional[Dict]:
+        # Keep one failing mod from aborting the whole batch
+        mod_name, channel, owner, package, prev = job
+        try:
+            return get_latest_mod_info(channel, owner, package, prev)
+        except Exception as e:
+            logger.error(f"Error fetching {mod_name}: {e}")
+            return None
+
+    if mods:
+        warm_dns()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = [info for info in executor.map(fetch_job, iter_jobs()) if info is not None]
 
-    results.sort(key=lambda x: x.get("raw_date", ""), reverse=True)
+    results.sort(key=itemgetter("raw_date"), reverse=True)
     return results
 
 
-def load_previous_output() -> Dict[str, str]:
+@lru_cache(maxsize=1)
+def download_previous_output() -> Tuple[Mapping, ...]:
+    """
+    Download the previous output JSON from GitHub and return its mod entries as read-only mappings.
+    Raises on failure, so only successful downloads are cached for the lifetime of the process.
+    """
+    resp = SESSION.get(PREVIOUS_OUTPUT_URL, timeout=10)
+    resp.raise_for_status()
+    return tuple(MappingProxyType(item) for item in orjson.loads(resp.content))
+
+
+def load_previous_output() -> Tuple[Mapping, ...]:
     """
-    Download the previous output JSON from GitHub and return a dict mapping name to version.
+    Return the previous run's mod entries, or an empty tuple if they cannot be downloaded.
     """
     try:
-        resp = requests.get(PREVIOUS_OUTPUT_URL, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        return {item['name']: item.get('version') for item in data}
+        return download_previous_output()
     except Exception as e:
         logger.warning(f"Failed to load previous output: {e}")
-        return {}
+        return ()
 
 
 def compute_updates(new_data: List[Dict], prev_versions: Dict[str, str]) -> List[str]:
     """
     Compare new data with previous versions and return a list of updated mod names.
     """
-    updates = []
-    for mod in new_data:
-        name = mod.get('name')
-        version = mod.get('version')
-        if not name or not version:
-            continue
-        prev = prev_versions.get(name)
-        if prev is None or prev != version:
-            updates.append(name)
-    return updates
+    new_versions = {m['name']: m['version'] for m in new_data if m.get('name') and m.get('version')}
+    return [name for name, version in new_versions.items() if prev_versions.get(name) != version]
 
 
 def print_table(updates: List[Dict], full: bool = False):
@@ -160,47 +247,61 @@ def print_table(updates: List[Dict], full: bool = False):
     Print a formatted table of mod updates. Use full=True for detailed output.
     """
     if not updates:
-        print(Fore.RED + "No updates found.")
+        print(RED + "No updates found." + RESET)
         return
 
     if full:
         headers = ["Name", "Description", "URL", "Download URL", "Icon URL", "Channel", "Owner", "Package", "Version", "Date Updated", "Full Name"]
-        rows = [[
-            u.get("name", ""),
-            u.get("description", ""),
-            u.get("url", ""),
-            u.get("download_url", ""),
-            u.get("icon_url", ""),
-            u.get("channel", ""),
-            u.get("owner", ""),
-            u.get("package", ""),
-            u.get("version", ""),
-            u.get("date_updated", ""),
-            u.get("full_name", "")
-        ] for u in updates]
+        keys = FULL_TABLE_KEYS
     else:
         headers = ["Name", "Version", "Date Updated", "URL"]
-        rows = [[u.get("name"), u.get("version"), u.get("date_updated"), u.get("url")] for u in updates]
+        keys = SUMMARY_TABLE_KEYS
+
+    # Fill in missing fields once so the getter never raises KeyError
+    for u in updates:
+        for key in keys:
+            u.setdefault(key, "")
+    row_getter = itemgetter(*keys)
+    rows = [row_getter(u) for u in updates]
 
-    col_widths = [max(len(str(h)), *(len(str(row[i])) for row in rows)) for i, h in enumerate(headers)]
+    str_rows = [[str(cell) for cell in row] for row in rows]
+    col_widths = [max(len(h), *map(len, col)) for h, col in zip(headers, zip(*str_rows))]
     border = "+" + "+".join("-" * (w + 2) for w in col_widths) + "+"
-    print(border)
-    header_line = (
-        "| " + " | ".join(
-            Fore.CYAN + headers[i].ljust(col_widths[i]) + Style.RESET_ALL
-            for i in range(len(headers))
-        ) + " |"
-    )
-    print(header_line)
-    print(border)
-    for row in rows:
-        print("| " + " | ".join(str(row[i]).ljust(col_widths[i]) for i in range(len(headers))) + " |")
-    print(border)
+    header_line = "| " + " | ".join(CYAN + h.ljust(w) + RESET for h, w in zip(headers, col_widths)) + " |"
+
+    row_template = "| " + " | ".join("{:<" + str(w) + "}" for w in col_widths) + " |"
+
+    # Build the whole table first and emit it with a single write
+    lines = [border, header_line, border]
+    lines.extend(row_template.format(*row) for row in str_rows)
+    lines.append(border)
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def build_telegram_messages(updated: List[str], limit: int = TELEGRAM_CHUNK_SIZE) -> List[str]:
+    """
+    Build the Telegram message texts for the updated mods, split into chunks of at most `limit` characters.
+    """
+    if not updated:
+        return ["No mod updates detected."]
+
+    messages = []
+    buffer = "The following Thunderstore mods have been updated:"
+    for name in updated:
+        line = f"\n- {name}"
+        if len(buffer) + len(line) > limit:
+            messages.append(buffer)
+            line = line.lstrip("\n")
+            buffer = ""
+        buffer += line
+    messages.append(buffer)
+    return messages
 
 
 def send_telegram(updated: List[str]):
     """
     Send a Telegram message listing updated mods, or notify if no updates.
+    Long lists are split across several messages to stay under Telegram's size limit.
     """
     token = os.getenv('TELEGRAM_BOT_TOKEN')
     chat_id = os.getenv('TELEGRAM_CHAT_ID')
@@ -209,23 +310,29 @@ def send_telegram(updated: List[str]):
         return
 
     url = f"https://api.telegram.org/bot{token}/sendMessage"
-    if updated:
-        message = "The following Thunderstore mods have been updated:\n" + "\n".join(f"- {name}" for name in updated)
-    else:
-        message = "No mod updates detected."
-
-    payload = {'chat_id': chat_id, 'text': message, 'disable_web_page_preview': True}
-    try:
-        resp = requests.post(url, json=payload, timeout=10)
-        if not resp.ok:
-            logger.error(f"Telegram API error {resp.status_code}: {resp.text}")
-        else:
-            logger.info("Telegram notification sent successfully.")
-    except Exception as e:
-        logger.error(f"Error sending Telegram message: {e}")
-
-
-def main():
+    for message in build_telegram_messages(updated):
+        payload = {'chat_id': chat_id, 'text': message, 'disable_web_page_preview': True}
+        try:
+            resp = SESSION.post(url, json=payload, timeout=10)
+            if resp.status_code == 429:
+                # Only wait when Telegram actually asks us to
+                retry_after = resp.json().get("parameters", {}).get("retry_after", 1)
+                logger.warning(f"Telegram rate limit hit, retrying in {retry_after}s")
+                time.sleep(retry_after)
+                resp = SESSION.post(url, json=payload, timeout=10)
+            if not resp.ok:
+                logger.error(f"Telegram API error {resp.status_code}: {resp.text}")
+                return
+        except Exception as e:
+            logger.error(f"Error sending Telegram message: {e}")
+            return
+    logger.info("Telegram notification sent successfully.")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command-line argument parser.
+    """
     parser = argparse.ArgumentParser(
         description="Fetch Thunderstore mod versions, detect changes, and optionally notify via Telegram."
     )
@@ -246,13 +353,27 @@ def main():
         "--full-output", action='store_true',
         help="Include detailed mod information in the output."
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--max-workers", type=int, default=POOL_SIZE,
+        help="Number of concurrent Thunderstore API requests."
+    )
+    return parser
+
+
+PARSER = build_parser()
+
+
+def main(argv: Optional[List[str]] = None):
+    args = PARSER.parse_args(argv)
 
-    # Load previous versions
-    previous_versions = load_previous_output()
+    # Load previous output and versions
+    previous_mods = load_previous_output()
+    previous_versions = {item['name']: item.get('version') for item in previous_mods if item.get('name')}
 
-    # Fetch latest mod data
-    latest_mods = fetch_all_updates(args.mods_url)
+    # Fetch the mod list once and the latest data for each mod
+    mods = load_mods_list(args.mods_url)
+    logger.info(f"Checking {len(mods)} mods for updates")
+    latest_mods = fetch_all_updates(mods, max_workers=args.max_workers, previous=previous_mods)
 
     # Determine which mods were updated
     updated_mods = compute_updates(latest_mods, previous_versions)
@@ -263,8 +384,8 @@ def main():
     # Save current output if requested
     if args.output:
         output_data = latest_mods
-        with open(args.output, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        with open(args.output, 'wb') as f:
+            f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
         logger.info(f"Results saved to {args.output}")
 
     # Send Telegram notification if requested